@@ -3,11 +3,12 @@
 # pyright: strict
 
 from typing import (
-    TypedDict,
+    NamedTuple,
     Literal,
     Dict,
     List,
     Callable,
+    Tuple,
     Any,
     cast,
     Optional as Opt,
@@ -19,10 +20,25 @@ import os
 import pwd
 import grp
 import stat
-import datetime
+import time
+import math
 import argparse
 import subprocess
-from functools import reduce
+import codecs
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from operator import attrgetter
+
+##
+## libmagic bindings are optional, we fall back
+## to shelling out to file(1) when not installed.
+##
+try:
+    import magic  # pyright: ignore[reportMissingImports]
+except ImportError:
+    magic = None
 
 
 class StatRes:
@@ -35,6 +51,10 @@ class StatRes:
 
 FileType = Literal["file", "directory"]
 
+
+DirItem = Tuple[str, 'os.DirEntry[str]']
+
+
 ContentType = Literal[
     "directory",
     "not_readable",
@@ -47,22 +67,33 @@ ContentType = Literal[
 ]
 
 
-class FileRowInfo(TypedDict):
+class FileRowInfo(NamedTuple):
     fname: str
     ftype: FileType
     stat_res: StatRes
+    target_stat: Opt[StatRes]
+    islink: bool
+    realname: str
+    access: int
+    head: bytes
     contenttype: ContentType
-    timeepoch: str
 
 
-class FileRow(TypedDict):
+SortKey = Tuple[int, str]
+
+
+class FileRow(NamedTuple):
     info: FileRowInfo
-    render: Dict[str, str]
+    render: List[str]
+    sortkey: SortKey
 
 
 FileRows = List[FileRow]
 
 
+FileInfos = Dict[str, ContentType]
+
+
 Align = Literal["left", "right"]
 
 
@@ -75,19 +106,25 @@ ColsType = Literal[
 ColsTypes = List[ColsType]
 
 
-class FileDef(TypedDict):
+class FileDef(NamedTuple):
     align: Align
     name: ColsType
     onlyfull: bool
     func: Callable[[Any], str]
 
 
-ColPaddings = Dict[str, int]
+ColPaddings = List[int]
+
+
+ColSpecs = List[Tuple[int, ColsType, Align, Opt[str]]]
 
 
 FileDefs = Dict[ColsType, FileDef]
 
 
+RowFuncs = List[Callable[[FileRowInfo], str]]
+
+
 COLORS = {
     'red': '\033[31m',
     'magenta': '\033[35m',
@@ -118,69 +155,148 @@ COLOR_VALS = {
     'default': 'light_magenta'
 }
 
+##
+## Escape codes around a cell, by color def
+##
+COLOR_WRAP = {
+    clr: (COLORS[color], COLORS['end'])
+    for clr, color in COLOR_VALS.items()
+}
+
+##
+## Fields whose color does not depend on the row
+##
+COLOR_FIELDS = {
+    'targetname': 'targetname',
+    'timeiso': 'time',
+    'acls': 'acls',
+    'owner': 'owner',
+    'filetype': 'filetype',
+    'preview': 'preview'
+}
+
 
 PREVIEW_READ_LEN = 256
 PREVIEW_TRUNC_LEN = 48
+PREVIEW_DIR_COUNT = 32
+PREVIEW_DIR_LEN = 38
+
+##
+## Bytes read from the start of each file, shared by the
+## fallback content type sniff and the preview.
+##
+HEAD_READ_LEN = max(PREVIEW_READ_LEN, 512)
+
+##
+## Turn into spaces
+##
+## * First 32 characters of ascii
+## * The DEL character
+##
+## Runs of these and any other whitespace are then
+## collapsed by splitting.
+##
+PREVIEW_TEXT_TABLE = dict.fromkeys([*range(0x0000, 0x0021), 0x0127], ' ')
+
+##
+## Everything except printable ascii and the
+## tab through carriage return whitespace
+##
+PREVIEW_BINARY_DELETE = bytes(
+    b for b in range(256) if not (
+        (b >= 0x0021 and b <= 0x007E) or
+        (b >= 0x0009 and b <= 0x000D)
+    )
+)
+
+RE_MIME_TEXT = re.compile('(?u)[^a-zA-Z]text[^a-zA-Z]')
+RE_MIME_EXEC = re.compile('(?u)[^a-zA-Z]x-(executable|sharedlib)[^a-zA-Z]')
 
 DEFAULT_START_PATH = './'
 
+##
+## Filled straight from a struct_time, year first
+##
+TIME_FORMAT = '%04d-%02d-%02d %02d:%02d:%02d'
+
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+MIN_THREADED_ROWS = 8
+
+##
+## Same credentials os.access() checks against
+##
+ACCESS_UID = os.getuid()
+ACCESS_GIDS = frozenset(os.getgroups()) | {os.getgid()}
+ACCESS_ACL_XATTR = 'system.posix_acl_access'
+ACCESS_HAS_XATTR = hasattr(os, 'getxattr')
+
+##
+## file(1)'s own python bindings are also imported as
+## magic but have no Magic class, treat them as absent.
+##
+MAGIC: Any = (
+    cast(Any, magic).Magic(mime=True) if hasattr(magic, 'Magic') else
+    None
+)
+
+FILE_CMD = shutil.which('file')
 
-def sortfile(row: FileRow):
-    fname = row['info']['fname']
+
+def sortfile(rowinfo: FileRowInfo):
+    fname = rowinfo.fname
     lowfname = fname.strip().lower()
-    key = 0 if (row['info']['ftype'] == 'directory') else 1
-    out = (key, lowfname)
+    key = 0 if (rowinfo.ftype == 'directory') else 1
+    out: SortKey = (key, lowfname)
     return out
 
 
 def getcolordefs(row: FileRow, field: str):
-    if field == 'targetname':
-        return 'targetname'
     if field == 'srcname':
-        if row['info']['ftype'] == 'directory':
+        if row.info.ftype == 'directory':
             return 'srcname_directory'
         return 'srcname_file'
-    if field == 'timeiso':
-        return 'time'
     if field == 'size':
-        if row['info']['ftype'] == 'directory':
+        if row.info.ftype == 'directory':
             return 'size_filecount'
         return 'size_bytes'
-    if field == 'acls':
-        return 'acls'
-    if field == 'owner':
-        return 'owner'
-    if field == 'size':
-        return 'size'
-    if field == 'filetype':
-        return 'filetype'
-    if field == 'preview':
-        return 'preview'
-    return 'default'
+    return COLOR_FIELDS.get(field, 'default')
 
 
-def addpadding(field: str, val: str, colpaddings: ColPaddings, align: Align):
+def addpadding(index: int, val: str, colpaddings: ColPaddings, align: Align):
     if len(val) == 0:
         return ' '
-    alignchar = '>' if (align == 'right') else '<'
-    padlen = colpaddings[field]
-    padstr = ''.join(['{:', alignchar, str(padlen), 's}'])
-    ret = padstr.format(val)
-    return ret
+    padlen = colpaddings[index]
+    if align == 'right':
+        return val.rjust(padlen)
+    return val.ljust(padlen)
 
 
-def makepretty(row: FileRow, field: ColsType, colpaddings: ColPaddings, fdefs: FileDefs):
-    align = fdefs[field]['align']
-    clr = getcolordefs(row, field)
-    clrval = COLOR_VALS[clr]
-    textval = row['render'][field]
-    paddedval = addpadding(field, textval, colpaddings, align)
-    colorval = addcolor(paddedval, clrval)
-    return colorval
+def getfixedcolordefs(field: str):
+    """
+    Color def for columns that color every row the same,
+    None for the ones that have to look at the row.
+    """
+    if field in ('srcname', 'size'):
+        return None
+    return COLOR_FIELDS.get(field, 'default')
 
 
-def addcolor(text: str, color: str):
-    return text.join([COLORS[color], COLORS['end']])
+def makepretty(
+        row: FileRow,
+        index: int,
+        field: ColsType,
+        align: Align,
+        fixedclr: Opt[str],
+        colpaddings: ColPaddings
+):
+    clr = getcolordefs(row, field) if fixedclr is None else fixedclr
+    textval = row.render[index]
+    return addcolor(addpadding(index, textval, colpaddings, align), clr)
+
+
+def addcolor(text: str, clr: str):
+    prefix, suffix = COLOR_WRAP[clr]
+    return f'{prefix}{text}{suffix}'
 
 
 def getcolslisting(full: bool=False):
@@ -198,174 +314,229 @@ def getcolslisting(full: bool=False):
     return out
 
 
-def structurecols(row: FileRow, colpaddings: ColPaddings, fdefs: FileDefs, full: bool=False):
-    colslisting = getcolslisting(full=full)
-    return map(lambda name: makepretty(row, name, colpaddings, fdefs), colslisting)
+def structurecols(row: FileRow, colspecs: ColSpecs, colpaddings: ColPaddings):
+    return [
+        makepretty(row, index, name, align, fixedclr, colpaddings)
+        for index, name, align, fixedclr in colspecs
+    ]
 
 
-def rendercols(row: FileRow, colpaddings: ColPaddings, fdefs: FileDefs, full: bool=False):
+def rendercols(row: FileRow, colspecs: ColSpecs, colpaddings: ColPaddings):
     margin = '  '
-    structcols = structurecols(row, colpaddings, fdefs, full=full)
+    structcols = structurecols(row, colspecs, colpaddings)
     return ''.join([margin, margin.join(structcols)])
 
 
-def getcolpaddings(rows: FileRows):
-    longest: Dict[str, int] = {}
-    for row in rows:
-        for colname, colval in row['render'].items():
-            if colname not in longest:
-                longest[colname] = 0
-            collen = len(colval)
-            if collen > longest[colname]:
-                longest[colname] = collen
-    return longest
+def collectrows(built: Iter[FileRow], numcols: int):
+    """
+    Gathers the built rows and the widest cell of each
+    column in the same pass, so the paddings never need
+    a second walk over every row.
+    """
+    rows: FileRows = []
+    longest: ColPaddings = [0] * numcols
+    for row in built:
+        rows.append(row)
+        longest = list(map(max, longest, map(len, row.render)))
+    ret: Tuple[FileRows, ColPaddings] = (rows, longest)
+    return ret
 
 
 def getrowdefs():
     ret: FileDefs = {
-        'acls': {
-            'name': 'acls',
-            'func': col_acls,
-            'onlyfull': True,
-            'align': 'left'
-        },
-        'owner': {
-            'name': 'owner',
-            'func': col_owner,
-            'onlyfull': True,
-            'align': 'left'
-        },
-        'filetype': {
-            'name': 'filetype',
-            'func': col_filetype,
-            'onlyfull': True,
-            'align': 'left'
-        },
-        'size': {
-            'name': 'size',
-            'func': col_size,
-            'onlyfull': False,
-            'align': 'right'
-        },
-        'timeiso': {
-            'name': 'timeiso',
-            'func': col_timeiso,
-            'onlyfull': False,
-            'align': 'left'
-        },
-        'srcname': {
-            'name': 'srcname',
-            'func': col_srcname,
-            'onlyfull': False,
-            'align': 'left'
-        },
-        'targetname': {
-            'name': 'targetname',
-            'func': col_targetname,
-            'onlyfull': False,
-            'align': 'left'
-        },
-        'preview': {
-            'name': 'preview',
-            'func': col_preview,
-            'onlyfull': True,
-            'align': 'left'
-        }
+        'acls': FileDef(
+            name='acls',
+            func=col_acls,
+            onlyfull=True,
+            align='left'
+        ),
+        'owner': FileDef(
+            name='owner',
+            func=col_owner,
+            onlyfull=True,
+            align='left'
+        ),
+        'filetype': FileDef(
+            name='filetype',
+            func=col_filetype,
+            onlyfull=True,
+            align='left'
+        ),
+        'size': FileDef(
+            name='size',
+            func=col_size,
+            onlyfull=False,
+            align='right'
+        ),
+        'timeiso': FileDef(
+            name='timeiso',
+            func=col_timeiso,
+            onlyfull=False,
+            align='left'
+        ),
+        'srcname': FileDef(
+            name='srcname',
+            func=col_srcname,
+            onlyfull=False,
+            align='left'
+        ),
+        'targetname': FileDef(
+            name='targetname',
+            func=col_targetname,
+            onlyfull=False,
+            align='left'
+        ),
+        'preview': FileDef(
+            name='preview',
+            func=col_preview,
+            onlyfull=True,
+            align='left'
+        )
     }
     return ret
 
 
-def renderrows(rows: FileRows, full: bool=False):
-    colpaddings = getcolpaddings(rows)
-    fdefs = getrowdefs()
-    rendered = map(lambda r: rendercols(r, colpaddings, fdefs, full=full), rows)
-    out = '\n'.join(rendered)
-    return out
+def renderrows(rows: FileRows, colpaddings: ColPaddings, fdefs: FileDefs, full: bool=False):
+    """
+    Lazily renders each row to utf-8, so the listing
+    can be streamed without ever being joined.
+    """
+    ##
+    ## Same columns in the same order for every row, the
+    ## index is the column's position in each rendered row.
+    ## Fixed colors are settled here rather than per cell.
+    ##
+    colindex = {name: index for index, name in enumerate(fdefs)}
+    colspecs: ColSpecs = [
+        (colindex[name], name, fdefs[name].align, getfixedcolordefs(name))
+        for name in getcolslisting(full=full)
+    ]
+    ##
+    ## Names that are not valid utf-8 come back from the
+    ## filesystem as surrogates, write their original bytes.
+    ##
+    return (
+        rendercols(row, colspecs, colpaddings).encode('utf-8', 'surrogateescape')
+        for row in rows
+    )
 
 
-def get_acls_me(fname: str, stat_res: StatRes):
-    t_no = 0
-    me_can_read = os.access(fname, os.R_OK)
-    me_can_write = os.access(fname, os.W_OK)
-    me_can_exec = os.access(fname, os.X_OK)
-    me_pdefs = [
-        (me_can_read, 4),
-        (me_can_write, 2),
-        (me_can_exec, 1)
-    ]
-    me_vals = map(lambda x: x[1] if x[0] else t_no, me_pdefs)
-    me_acls_num = reduce(lambda x, y: x | y, me_vals, 0)
-    me_acls_mode = str(me_acls_num)
-    return me_acls_mode
+##
+## At most 512 permission sets, and a directory
+## usually only uses a handful of them
+##
+@lru_cache(maxsize=None)
+def get_mode_str(perms: int):
+    return format(perms, '03o')
 
 
 def get_acls_all(fname: str, stat_res: StatRes):
-    return str(oct(stat.S_IMODE(stat_res.st_mode)))[-3:]
+    ##
+    ## Only the rwx triplets, setuid/setgid/sticky are not shown
+    ##
+    return get_mode_str(stat_res.st_mode & 0o777)
 
 
 def col_acls(rowinfo: FileRowInfo):
-    fname = rowinfo['fname']
-    stat_res = rowinfo['stat_res']
+    fname = rowinfo.fname
+    stat_res = rowinfo.stat_res
     all_acls_mode = get_acls_all(fname, stat_res)
-    me_acls_mode = get_acls_me(fname, stat_res)
+    me_acls_mode = str(rowinfo.access)
     return ' '.join([all_acls_mode, me_acls_mode])
 
 
+##
+## Ids without an entry fall back to the number, and are
+## cached too so a missing id only costs one NSS lookup.
+##
+@lru_cache(maxsize=None)
+def get_owner_name(uid: int):
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+@lru_cache(maxsize=None)
+def get_group_name(gid: int):
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return str(gid)
+
+
 def col_owner(rowinfo: FileRowInfo):
-    stat_res = rowinfo['stat_res']
-    owner = pwd.getpwuid(stat_res.st_uid).pw_name
-    group = grp.getgrgid(stat_res.st_gid).gr_name
+    stat_res = rowinfo.stat_res
+    owner = get_owner_name(stat_res.st_uid)
+    group = get_group_name(stat_res.st_gid)
     ret = ':'.join([owner, group])
     return ret
 
 
+@lru_cache(maxsize=None)
+def get_size_str(size: int):
+    return format(size, ',')
+
+
 def getfilesize(rowinfo: FileRowInfo):
-    stat_res = rowinfo['stat_res']
-    ret = '{:,}'.format(stat_res.st_size)
+    stat_res = rowinfo.stat_res
+    ret = get_size_str(stat_res.st_size)
     return ret
 
 
 def col_size(rowinfo: FileRowInfo):
-    if rowinfo['ftype'] == 'directory':
+    if rowinfo.ftype == 'directory':
         return getsubfilecount(rowinfo)
     return getfilesize(rowinfo)
 
 
+##
+## Files unpacked or copied together tend to share an
+## mtime down to the second, so format each second once.
+##
+@lru_cache(maxsize=None)
+def get_time_str(sec: int):
+    return TIME_FORMAT % time.localtime(sec)[:6]
+
+
 def col_timeiso(rowinfo: FileRowInfo):
-    stat_res = rowinfo['stat_res']
-    dt = datetime.datetime.fromtimestamp(stat_res.st_mtime)
-    return dt.strftime('%Y-%m-%d %H:%M:%S')
+    stat_res = rowinfo.stat_res
+    ##
+    ## Floored like localtime() does with a float
+    ##
+    return get_time_str(math.floor(stat_res.st_mtime))
 
 
 def col_srcname(rowinfo: FileRowInfo):
-    fname = rowinfo['fname']
-    isdir = rowinfo['ftype'] == 'directory'
-    return ''.join([fname, '/']) if isdir else fname
+    fname = rowinfo.fname
+    isdir = rowinfo.ftype == 'directory'
+    return fname + '/' if isdir else fname
 
 
 def col_targetname(rowinfo: FileRowInfo):
-    fname = rowinfo['fname']
-    islink = os.path.islink(fname)
-    if islink:
-        real = os.path.relpath(os.path.realpath(fname))
-        isdir = rowinfo['ftype'] == 'directory'
-        return ''.join([real, '/']) if isdir else real
+    if rowinfo.islink:
+        real = rowinfo.realname
+        isdir = rowinfo.ftype == 'directory'
+        return real + '/' if isdir else real
     return ' '
 
 
 def getsubfilecount(rowinfo: FileRowInfo):
-    fname = rowinfo['fname']
-    islink = os.path.islink(fname)
-    real = os.path.relpath(os.path.realpath(fname)) if islink else fname
-    if not os.path.isdir(real):
+    if rowinfo.ftype != 'directory':
         return '-'
-    if not os.access(real, os.R_OK):
+    ##
+    ## Let the open decide readability, the same call also
+    ## covers a directory that went away since the listing.
+    ##
+    try:
+        with os.scandir(rowinfo.realname) as entries:
+            return str(sum(1 for _ in entries))
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
         return '-'
-    return str(len(os.listdir(real)))
 
 
 def col_filetype(rowinfo: FileRowInfo):
-    contenttype = rowinfo['contenttype']
+    contenttype = rowinfo.contenttype
     if contenttype == 'directory':
         return 'd'
     if contenttype == 'binary_executable':
@@ -378,89 +549,196 @@ def col_filetype(rowinfo: FileRowInfo):
 
 
 def col_preview(rowinfo: FileRowInfo):
-    fname = rowinfo['fname']
-    contenttype = rowinfo['contenttype']
+    fname = rowinfo.fname
+    contenttype = rowinfo.contenttype
     if contenttype == 'directory':
         return preview_directory(fname)
     if contenttype == 'binary_other':
-        return preview_binary(fname)
+        return preview_binary(rowinfo.head[:PREVIEW_READ_LEN])
     if contenttype == 'text':
-        return preview_text(fname)
+        return preview_text(rowinfo.head[:PREVIEW_READ_LEN])
     return ' '
 
 
 def preview_directory(fname: str):
 
-    def _func(subfname: str):
-        checkfname = os.path.join(fname, subfname)
-        real = (
-            os.path.relpath(os.path.realpath(checkfname)) if
-            os.path.islink(checkfname) else
-            checkfname
-        )
-        path = (
-            ''.join([checkfname, '/']) if
-            os.path.isdir(real) else
-            checkfname
-        )
-        stripped = path[(len(fname) + 1):]
-        return stripped
+    def _func(entry: 'os.DirEntry[str]'):
+        ##
+        ## d_type answers this without a stat, except
+        ## for symlinks which need to be followed. A link
+        ## that loops or points somewhere unreadable is
+        ## shown as a plain name, like os.path.isdir did.
+        ##
+        try:
+            isdir = entry.is_dir()
+        except OSError:
+            isdir = False
+        return ''.join([entry.name, '/']) if isdir else entry.name
 
     try:
-        all_files = os.listdir(fname)
+        with os.scandir(fname) as entries:
+            ##
+            ## One entry past the preview is enough to know it
+            ## is truncated, no need to read the whole directory.
+            ##
+            sub_entries = list(islice(entries, PREVIEW_DIR_COUNT + 1))
     except PermissionError:
         return "-"
-    all_len = len(all_files)
-    sub_files = list(map(_func, all_files[:32]))
-    sub_len = len(sub_files)
+    truncated_listing = len(sub_entries) > PREVIEW_DIR_COUNT
+    ##
+    ## Names past the cut are never shown, stop once the
+    ## joined names would reach it.
+    ##
+    sub_files: List[str] = []
+    txtlen = -1
+    for entry in sub_entries[:PREVIEW_DIR_COUNT]:
+        if txtlen >= PREVIEW_DIR_LEN:
+            break
+        sub_file = _func(entry)
+        sub_files.append(sub_file)
+        txtlen += len(sub_file) + 1
     txt = ' '.join(sub_files)
-    truncated = txt[:38]
+    truncated = txt[:PREVIEW_DIR_LEN]
     lastindex = truncated.rfind(' ')
     cleaned = (
         truncated if
         (lastindex < 1) else
         truncated[:lastindex]
     )
-    return ' '.join([cleaned, '...']) if sub_len < all_len else cleaned
-
+    return ' '.join([cleaned, '...']) if truncated_listing else cleaned
 
-def preview_binary(fname: str):
-    def _inrange(a: int):
-        return (
-            (a >= 0x0021 and a <= 0x007E) or
-            (a >= 0x0009 and a <= 0x000D)
-        )
 
-    data: bytes
-    with open(fname, 'rb') as fh:
-        data = fh.read(PREVIEW_READ_LEN)
+def preview_binary(data: bytes):
     if len(data) == 0:
         return ' '
-    newdata = ''.join(map(chr, filter(_inrange, data)))
-    stripped = newdata.strip()
-    cleaned = re.sub(r"(?u)[\s]+", ' ', stripped)
-    return cleaned[:PREVIEW_TRUNC_LEN]
+    ##
+    ## Only printable ascii and whitespace survive the
+    ## translate, so a bytes split collapses and trims the
+    ## whitespace runs and only the kept slice is decoded.
+    ##
+    newdata = data.translate(None, PREVIEW_BINARY_DELETE)
+    cleaned = b' '.join(newdata.split())
+    return cleaned[:PREVIEW_TRUNC_LEN].decode('ascii')
 
 
-def preview_text(fname: str):
-    data: str
-    with open(fname, 'rt', errors='replace') as fh:
-        data = fh.read(PREVIEW_READ_LEN)
+def preview_text(raw: bytes):
+    ##
+    ## Non-final decode, so a multibyte character cut by
+    ## the read length is dropped instead of replaced.
+    ##
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    data = decoder.decode(raw, final=False)
     if len(data) == 0:
         return ' '
+    cleaned = ' '.join(data.translate(PREVIEW_TEXT_TABLE).split())
+    return cleaned[:PREVIEW_TRUNC_LEN]
+
+
+def getfileinfo(fname: str, realname: str, head: bytes, fileinfos: Opt[FileInfos] = None):
+    if MAGIC is not None:
+        return getfileinfo_magic(realname)
+    if (fileinfos is not None) and (fname in fileinfos):
+        return fileinfos[fname]
+    if FILE_CMD is None:
+        return getfileinfo_sniff(head)
+    return getfileinfo_subproc(fname)
+
+
+def getfileinfo_sniff(data: bytes):
+    """
+    Last resort when neither libmagic nor file(1) is around,
+    a rough guess from the first bytes of the file.
+    """
     ##
-    ## Match
+    ## ELF, only ET_EXEC is treated as an executable since
+    ## ET_DYN covers both PIE executables and shared libs
     ##
-    ## * First 32 characters of ascii
-    ## * The DEL character
-    ## * Anything that is a whitespace
+    if data.startswith(b'\x7fELF'):
+        if len(data) < 18:
+            return cast(ContentType, 'binary_other')
+        etype = (
+            (data[16] | (data[17] << 8)) if
+            (data[5] == 1) else
+            ((data[16] << 8) | data[17])
+        )
+        if etype == 2:
+            return cast(ContentType, 'binary_executable')
+        return cast(ContentType, 'binary_other')
+    if b'\0' in data:
+        return cast(ContentType, 'binary_other')
     ##
-    pat = r'(?u)[\u0000-\u0020\u0127\s]+'
-    cleaned = re.sub(pat, ' ', data).strip()
-    return cleaned[:PREVIEW_TRUNC_LEN]
+    ## Text if it decodes, allowing for a multibyte
+    ## character cut off at the end of the read
+    ##
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(data, final=False)
+    except UnicodeDecodeError:
+        return cast(ContentType, 'binary_other')
+    return cast(ContentType, 'text')
 
 
-def getfileinfo(fname: str):
+def getfileinfos(fnames: List[str]):
+    """
+    One file(1) run for a whole listing. Names go in on stdin
+    one per line, --print0 puts a NUL between each name and
+    its mime so results can be matched back up, and --raw
+    stops it escaping unprintable bytes in the names it
+    echoes back. Names which contain a newline cannot be
+    fed this way and are left for getfileinfo to probe
+    one at a time.
+    """
+    infos: FileInfos = {}
+    batch = [fname for fname in fnames if '\n' not in fname]
+    if len(batch) == 0:
+        return infos
+    stdin = b''.join([os.fsencode(fname) + b'\n' for fname in batch])
+    with subprocess.Popen(
+            [
+                'file',
+                '--mime',
+                '--dereference',
+                '--raw',
+                '--print0',
+                '--files-from',
+                '-'
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+    ) as subproc:
+        rawdata, _ = subproc.communicate(stdin)
+    for line in rawdata.split(b'\n'):
+        rawname, sep, rawmime = line.partition(b'\0')
+        if len(sep) == 0:
+            continue
+        mime = rawmime.decode('utf-8', errors='replace')
+        infos[os.fsdecode(rawname)] = getmimecontenttype(mime)
+    return infos
+
+
+def getfileinfo_magic(realname: str):
+    """
+    libmagic does not follow symlinks by default, so it
+    is given the row's realname, already resolved for
+    links only, to match `file --dereference`.
+    """
+    mime = cast(str, MAGIC.from_file(realname))
+    ##
+    ## First check if text
+    ##
+    if mime.startswith('text/'):
+        return cast(ContentType, 'text')
+    ##
+    ## Executable binary file such as ELF
+    ##
+    if mime in ('application/x-executable', 'application/x-sharedlib'):
+        return cast(ContentType, 'binary_executable')
+    ##
+    ## Some other binary file such as an image
+    ##
+    return cast(ContentType, 'binary_other')
+
+
+def getfileinfo_subproc(fname: str):
     """
     See: http://stackoverflow.com/a/898759
     """
@@ -482,22 +760,19 @@ def getfileinfo(fname: str):
         rawdata = None if subproc.stdout is None else subproc.stdout.read()
     if rawdata is None:
         return cast(ContentType, "unknown")
-    data = rawdata.decode('utf-8', errors='replace')
+    return getmimecontenttype(rawdata.decode('utf-8', errors='replace'))
+
+
+def getmimecontenttype(data: str):
     ##
     ## First check if text
     ##
-    if (re.search('(?u)[^a-zA-Z]text[^a-zA-Z]', data) is not None):
+    if RE_MIME_TEXT.search(data) is not None:
         return cast(ContentType, 'text')
     ##
     ## Executable binary file such as ELF
     ##
-    if (
-            re.search(
-                '(?u)[^a-zA-Z]x-(executable|sharedlib)[^a-zA-Z]',
-                data
-            )
-            is not None
-    ):
+    if RE_MIME_EXEC.search(data) is not None:
         return cast(ContentType, 'binary_executable')
     ##
     ## Some other binary file such as an image
@@ -507,54 +782,154 @@ def getfileinfo(fname: str):
 
 
 def shouldbuild(defrec: FileDef, full: bool=False):
-    if defrec['onlyfull'] and (not full):
+    if defrec.onlyfull and (not full):
         return False
     return True
 
 
-def buildrow(fname: str, fdefs: FileDefs, full: bool=False):
-    rowinfo = getrowinfo(fname)
+def col_blank(rowinfo: FileRowInfo):
+    return ' '
 
-    def _func(rec: FileDef):
-        return (
-            rec['name'],
-            (
-                rec['func'](rowinfo) if
-                shouldbuild(rec, full=full) else
-                ' '
-            )
-        )
 
-    ret: FileRow = {
-        'info': rowinfo,
-        'render': dict(map(_func, fdefs.values()))
-    }
-    return ret
+def getrowfuncs(fdefs: FileDefs, full: bool=False):
+    """
+    One render function per column in fdefs order, with
+    columns outside this listing mode swapped for a blank
+    so rows do not check the mode cell by cell.
+    """
+    funcs: RowFuncs = [
+        rec.func if shouldbuild(rec, full=full) else col_blank
+        for rec in fdefs.values()
+    ]
+    return funcs
 
 
-def info_ftype(fname: str, stat_res: StatRes):
-    real = (
-        os.path.relpath(os.path.realpath(fname)) if
-        os.path.islink(fname) else 
-        fname
+def buildrow(item: DirItem, rowfuncs: RowFuncs, full: bool=False, fileinfos: Opt[FileInfos]=None):
+    rowinfo = getrowinfo(item, full=full, fileinfos=fileinfos)
+    ret = FileRow(
+        info=rowinfo,
+        render=[func(rowinfo) for func in rowfuncs],
+        sortkey=sortfile(rowinfo)
     )
-    if os.path.isdir(real):
-        return 'directory'
-    return 'file'
+    return ret
 
 
-def info_timeepoch(fname: str, stat_res: StatRes):
-    return str(stat_res.st_mtime)
+def info_targetstat(entry: 'os.DirEntry[str]', stat_res: StatRes):
+    """
+    Stat of whatever the entry points at, or None for
+    a dangling symlink.
+    """
+    if not entry.is_symlink():
+        return stat_res
+    try:
+        return cast(StatRes, entry.stat(follow_symlinks=True))
+    except OSError:
+        return None
+
+
+def info_realname(fname: str, islink: bool):
+    if islink:
+        return os.path.relpath(os.path.realpath(fname))
+    return fname
+
+
+def info_hasacl(fname: str):
+    """
+    One getxattr on the target, a missing attribute or a
+    filesystem without xattrs both mean no ACL.
+    """
+    if not ACCESS_HAS_XATTR:
+        return False
+    try:
+        os.getxattr(fname, ACCESS_ACL_XATTR)
+    except OSError:
+        return False
+    return True
+
+
+def info_access(fname: str, target_stat: Opt[StatRes]):
+    """
+    Permission bits for the current user, derived from the
+    mode instead of three os.access() calls. Files carrying
+    a POSIX ACL are the exception, the mode only shows its
+    mask, so those still ask the kernel.
+    """
+    if target_stat is None:
+        return 0
+    if info_hasacl(fname):
+        return (
+            (4 if os.access(fname, os.R_OK) else 0) |
+            (2 if os.access(fname, os.W_OK) else 0) |
+            (1 if os.access(fname, os.X_OK) else 0)
+        )
+    mode = target_stat.st_mode
+    ##
+    ## Root can read and write anything, but only execute
+    ## when some execute bit is set.
+    ##
+    if ACCESS_UID == 0:
+        canexec = stat.S_ISDIR(mode) or (mode & 0o111) != 0
+        return 6 | (1 if canexec else 0)
+    if target_stat.st_uid == ACCESS_UID:
+        return (mode >> 6) & 7
+    if target_stat.st_gid in ACCESS_GIDS:
+        return (mode >> 3) & 7
+    return mode & 7
+
+
+def info_ftype(target_stat: Opt[StatRes]):
+    if (target_stat is not None) and stat.S_ISDIR(target_stat.st_mode):
+        return 'directory'
+    return 'file'
 
 
-def info_contenttype(fname: str, stat_res: StatRes):
-    if os.path.isdir(fname):
+def info_head(fname: str, target_stat: Opt[StatRes], access: int, full: bool=False):
+    """
+    Opens the file once for both the content type probe
+    and the preview. Only regular files, reading a fifo
+    or device behind a symlink could block or never end.
+    None when the open fails after all, such as for a
+    file whose mode changed since it was stat'ed.
+    """
+    if (not full) or (target_stat is None) or (not (access & 4)):
+        return b''
+    if not stat.S_ISREG(target_stat.st_mode) or (target_stat.st_size == 0):
+        return b''
+    try:
+        fd = os.open(fname, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.pread(fd, HEAD_READ_LEN, 0)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def info_contenttype(
+        fname: str,
+        realname: str,
+        stat_res: StatRes,
+        ftype: FileType,
+        access: int,
+        head: bytes,
+        full: bool=False,
+        fileinfos: Opt[FileInfos]=None
+):
+    ##
+    ## Only the full listing shows anything derived from
+    ## the content type, skip the mime probe otherwise.
+    ##
+    if not full:
+        return 'unknown'
+    if ftype == 'directory':
         return 'directory'
-    if not os.access(fname, os.R_OK):
+    if not (access & 4):
         return 'not_readable'
     if stat_res.st_size == 0:
         return 'empty'
-    fileinfo = getfileinfo(fname)
+    fileinfo = getfileinfo(fname, realname, head, fileinfos=fileinfos)
     ##
     ## Binary Executable such as ELF
     ##
@@ -576,29 +951,98 @@ def info_contenttype(fname: str, stat_res: StatRes):
     return 'other'
 
 
-def getrowinfo(fname: str):
-    stat_res = cast(StatRes, os.lstat(fname))
-    ret: FileRowInfo = {
-        'fname': fname,
-        'stat_res': stat_res,
-        'ftype': info_ftype(fname, stat_res),
-        'contenttype': info_contenttype(fname, stat_res),
-        'timeepoch': info_timeepoch(fname, stat_res)
-    }
+def getrowinfo(item: DirItem, full: bool=False, fileinfos: Opt[FileInfos]=None):
+    fname, entry = item
+    stat_res = cast(StatRes, entry.stat(follow_symlinks=False))
+    islink = entry.is_symlink()
+    realname = info_realname(fname, islink)
+    target_stat = info_targetstat(entry, stat_res)
+    access = info_access(fname, target_stat)
+    ftype = info_ftype(target_stat)
+    head = info_head(fname, target_stat, access, full=full)
+    if head is None:
+        ##
+        ## Denied despite the mode, show it as not readable
+        ##
+        access &= ~4
+        head = b''
+    ret = FileRowInfo(
+        fname=fname,
+        stat_res=stat_res,
+        target_stat=target_stat,
+        islink=islink,
+        realname=realname,
+        access=access,
+        ftype=ftype,
+        head=head,
+        contenttype=(
+            info_contenttype(
+                fname,
+                realname,
+                stat_res,
+                ftype,
+                access,
+                head,
+                full=full,
+                fileinfos=fileinfos
+            )
+        )
+    )
     return ret
 
 
-def processrows(files: Iter[str], full: bool = False):
-    fdefs = getrowdefs()
-    return map(lambda fname: buildrow(fname, fdefs, full=full), files)
+def needsfileinfo(entry: 'os.DirEntry[str]'):
+    """
+    Whether a name goes into the batched file(1) run. Only
+    directories are left out, d_type answers that for all
+    but symlinks, so the pre-filter does not serialise the
+    lstats the row pool overlaps. A looping or unreachable
+    symlink is left out too, its row is never probed.
+    """
+    try:
+        return not entry.is_dir()
+    except OSError:
+        return False
+
+
+def processrows(files: List[DirItem], fdefs: FileDefs, full: bool = False, threads: int = MAX_WORKERS):
+    ##
+    ## Without libmagic, detect every file's content type up
+    ## front with a single file(1) process instead of one per row.
+    ##
+    fileinfos = (
+        getfileinfos([fname for fname, entry in files if needsfileinfo(entry)]) if
+        (full and (MAGIC is None) and (FILE_CMD is not None)) else
+        None
+    )
 
+    rowfuncs = getrowfuncs(fdefs, full=full)
 
-def concatoutput(data: str):
-    return ''.join(['\n', data, '\n', '\n'])
+    def _func(item: DirItem):
+        return buildrow(item, rowfuncs, full=full, fileinfos=fileinfos)
 
+    ##
+    ## Rows are almost entirely blocking syscalls, so
+    ## threads can overlap them despite the GIL. Small
+    ## listings are not worth starting the pool for.
+    ##
+    if (threads <= 1) or (len(files) <= MIN_THREADED_ROWS):
+        return collectrows(map(_func, files), len(fdefs))
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return collectrows(pool.map(_func, files), len(fdefs))
+
+
+def concatoutput(lines: Iter[bytes]):
+    yield b'\n'
+    sep = b''
+    for line in lines:
+        yield b''.join([sep, line])
+        sep = b'\n'
+    yield b'\n\n'
 
-def display(rows_str: str):
-    pagedisplay(concatoutput(rows_str))
+
+def display(lines: Iter[bytes]):
+    pagedisplay(concatoutput(lines))
     return True
 
 
@@ -607,31 +1051,59 @@ def get_dir_listing(start: Opt[str] = None, filtres: Opt[str] = None):
     realstart = os.path.relpath(start1) if start1 != "./" else start1
     if (not os.path.exists(start1)) or (not os.path.isdir(start1)):
         return None
-    files = os.listdir(start)
-    fpaths = (
-        iter(files) if
-        (filtres is None) else
-        filter(lambda f: filtres in f, files)
-    )
-    paths = map(
-        lambda f: os.path.join(
-            (realstart[2:] if (realstart[:2] == './') else realstart),
-            f
-        ),
-        fpaths
-    )
+    ##
+    ## The prefix never ends in a separator, so plain
+    ## concatenation matches os.path.join here.
+    ##
+    prefix = realstart[2:] if realstart.startswith('./') else realstart
+    sepprefix = ''.join([prefix, '/']) if len(prefix) > 0 else ''
+    ##
+    ## Keep the DirEntry alongside the path so rows can use
+    ## its cached stat and d_type instead of stat-ing again.
+    ##
+    with os.scandir(start1) as entries:
+        paths: List[DirItem] = [
+            (sepprefix + entry.name, entry) for entry in entries
+            if (filtres is None) or (filtres in entry.name)
+        ]
     return paths
 
 
-def getfiles(start: Opt[str] = None, full: bool = False, filtres: Opt[str] = None):
+def getfiles(
+        fdefs: FileDefs,
+        start: Opt[str] = None,
+        full: bool = False,
+        filtres: Opt[str] = None,
+        threads: int = MAX_WORKERS
+):
     paths = get_dir_listing(start=start, filtres=filtres)
     if paths is None:
         return None
-    processed = processrows(paths, full=full)
-    return sorted(processed, key=sortfile, reverse=False)
+    processed, colpaddings = processrows(paths, fdefs, full=full, threads=threads)
+    files = sorted(processed, key=attrgetter('sortkey'), reverse=False)
+    ret: Tuple[FileRows, ColPaddings] = (files, colpaddings)
+    return ret
 
 
-def pagedisplay(output: str):
+def writepager(pager: 'subprocess.Popen[bytes]', output: Iter[bytes]):
+    if pager.stdin is None:
+        return
+    try:
+        for chunk in output:
+            pager.stdin.write(chunk)
+        pager.stdin.close()
+    except BrokenPipeError:
+        ##
+        ## Pager quit before reading everything, the close
+        ## flushes whatever is left and fails the same way.
+        ##
+        try:
+            pager.stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def pagedisplay(output: Iter[bytes]):
     """
     See:
         https://chase-seibert.github.io/blog
@@ -650,12 +1122,9 @@ def pagedisplay(output: str):
             stdout=sys.stdout
         )
     )
-    encoded = output.encode('utf-8')
     with proc() as pager:
         try:
-            pager.communicate(encoded)
-            if pager.stdin is not None:
-                pager.stdin.close()
+            writepager(pager, output)
             pager.wait()
         except KeyboardInterrupt:
             ## TODO: Any way to stop ctrl-c from
@@ -664,12 +1133,30 @@ def pagedisplay(output: str):
             pager.wait()
 
 
-def run(start: Opt[str]=None, full: bool=False, filtres: Opt[str]=None):
-    files = getfiles(start=start, full=full, filtres=filtres)
-    if files is None:
+def run(start: Opt[str]=None, full: bool=False, filtres: Opt[str]=None, threads: int=MAX_WORKERS):
+    ##
+    ## Owner names, times and sizes are only memoized
+    ## for a single listing
+    ##
+    get_owner_name.cache_clear()
+    get_group_name.cache_clear()
+    get_time_str.cache_clear()
+    get_size_str.cache_clear()
+    fdefs = getrowdefs()
+    listing = (
+        getfiles(
+            fdefs,
+            start=start,
+            full=full,
+            filtres=filtres,
+            threads=threads
+        )
+    )
+    if listing is None:
         rendererror()
         return False
-    rows = renderrows(files, full=full)
+    files, colpaddings = listing
+    rows = renderrows(files, colpaddings, fdefs, full=full)
     display(rows)
     return True
 
@@ -707,6 +1194,16 @@ def getargs():
         default=False,
         action='store_true'
     )
+    arger.add_argument(
+        '-t',
+        '--stat-threads',
+        metavar='THREADS',
+        type=int,
+        help='Threads used to gather file info, 1 to disable',
+        dest='threads',
+        default=MAX_WORKERS,
+        action='store'
+    )
     args = arger.parse_args()
     return args
 
@@ -718,7 +1215,8 @@ def main():
         run(
             start=args.start,
             full=args.full,
-            filtres=args.filtres
+            filtres=args.filtres,
+            threads=args.threads
         )
     )
     if ret is False: